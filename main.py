@@ -1,16 +1,20 @@
 import asyncio
 import logging
 import sqlite3
-import aiohttp
 import json
 import os
+import re
+import time
 
-from dotenv import load_dotenv, find_dotenv
+from collections import defaultdict
 
-from datetime import datetime, timedelta
+from yarl import URL
+
+from datetime import datetime
 from typing import Dict, List, Optional
 
 from aiogram import Bot, Dispatcher, types, F
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -18,34 +22,250 @@ from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import ReplyKeyboardBuilder, InlineKeyboardBuilder
 
-load_dotenv()
+# orjson парсить відповіді API у 2-3 рази швидше за стандартний json
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# uvloop помітно прискорює event loop на сокето-важких навантаженнях;
+# якщо не встановлений (напр. Windows) — лишаємось на стандартному asyncio
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+# Redis — необов'язковий спільний кеш котирувань (вмикається через REDIS_URL)
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
 
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
+# Мінімальна пауза між запитами до Alpha Vantage, сек (free tier: ~12;
+# 0 вимикає паузу для преміум-ключів)
+ALPHA_VANTAGE_MIN_INTERVAL = float(os.getenv('ALPHA_VANTAGE_MIN_INTERVAL', '0'))
+REDIS_URL = os.getenv('REDIS_URL')
+
+
+def load_config():
+    """Підтягує .env і перечитує конфігурацію.
+
+    Викликається з main() перед створенням бота — сканування файлової
+    системи за .env не уповільнює імпорт модуля (тести, cold start)."""
+    global BOT_TOKEN, ALPHA_VANTAGE_API_KEY, ALPHA_VANTAGE_MIN_INTERVAL, REDIS_URL
+    from dotenv import load_dotenv
+    load_dotenv()
+    BOT_TOKEN = os.getenv('BOT_TOKEN')
+    ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
+    ALPHA_VANTAGE_MIN_INTERVAL = float(os.getenv('ALPHA_VANTAGE_MIN_INTERVAL', '0'))
+    REDIS_URL = os.getenv('REDIS_URL')
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+WELCOME_TEXT = """
+    ``🏦 <b>Вітаю у Фінансовому Консультанті!</b>
+
+    Я допоможу вам з аналізом фондового ринку:
+
+    📊 <b>Мої можливості:</b>
+    • Аналіз акцій за тікером
+    • Детальна інформація про компанії
+    • Калькулятор інвестицій
+    • Список відстеження акцій
+    • Ринкові новини та поради
+
+    <b>Команди:</b>
+    /stock [TICKER] - аналіз акції
+    /overview [TICKER] - огляд компанії
+    /watchlist - ваш список відстеження
+    /calculator - калькулятор інвестицій
+    /tips - інвестиційні поради
+    /help - допомога
+
+    Введіть тікер акції або скористайтесь меню 👇``
+"""
+
+TIPS_TEXT = "💡 <b>Інвестиційні поради:</b>\n\n" + "\n\n".join([
+    "💡 <b>Диверсифікація</b> - не вкладайте всі гроші в одну акцію",
+    "📊 <b>Аналізуйте P/E ratio</b> - показник переоціненості компанії",
+    "🎯 <b>Довгострокові інвестиції</b> зазвичай менш ризиковані",
+    "📈 <b>Dollar Cost Averaging</b> - купуйте регулярно малими сумами",
+    "🔍 <b>Вивчайте компанію</b> перед інвестуванням",
+    "⚖️ <b>Ризик та прибуток</b> завжди пов'язані",
+    "📰 <b>Слідкуйте за новинami</b> компанії та ринку"
+])
+
+
+# Шаблони відповідей: рядок-літерал будується один раз при імпорті,
+# на запит лишається тільки format_map із готовим словником
+STOCK_TEMPLATE = """
+📊 <b>Аналіз акції {symbol}</b>
+
+💰 <b>Поточна ціна:</b> ${price:.2f}
+{change_emoji} <b>Зміна:</b> {change_color} ${change:+.2f} ({change_percent})
+
+📈 <b>Максимум дня:</b> ${high:.2f}
+📉 <b>Мінімум дня:</b> ${low:.2f}
+🎯 <b>Ціна відкриття:</b> ${open:.2f}
+🔒 <b>Попереднє закриття:</b> ${previous_close:.2f}
+📊 <b>Об'єм торгів:</b> {volume:,}
+
+⏰ <b>Оновлено:</b> {updated}
+        """
+
+OVERVIEW_TEMPLATE = """
+🏢 <b>Огляд компанії {Symbol}</b>
+
+📝 <b>Назва:</b> {Name}
+🏭 <b>Сектор:</b> {Sector}
+🔧 <b>Індустрія:</b> {Industry}
+🌍 <b>Країна:</b> {Country}
+
+💹 <b>Ринкова капіталізація:</b> ${MarketCapitalization}
+💰 <b>P/E коефіцієнт:</b> {PERatio}
+📊 <b>EPS:</b> {EPS}
+💵 <b>Дивіденди:</b> {DividendYield}
+
+📈 <b>52-тижневий максимум:</b> ${week_high}
+📉 <b>52-тижневий мінімум:</b> ${week_low}
+
+📄 <b>Опис:</b> {description_short}...
+        """
+
+# Вхідний формат калькулятора: TICKER кількість ціна
+_CALC_RE = re.compile(r'^\s*([A-Za-z.]{1,6})\s+(\d{1,9})\s+(\d+(?:\.\d+)?)\s*$')
+
+
 class UserStates(StatesGroup):
     waiting_for_ticker = State()
     setting_alert = State()
     calculator_input = State()
 
 class FinancialBot:
+    # Відповідність полів Alpha Vantage нашому словнику котирування:
+    # (наш ключ, ключ API, конвертер, значення за замовчуванням)
+    _QUOTE_FIELDS = (
+        ('symbol', '01. symbol', str, ''),
+        ('price', '05. price', float, 0),
+        ('change', '09. change', float, 0),
+        ('change_percent', '10. change percent', str, '0%'),
+        ('volume', '06. volume', int, 0),
+        ('high', '03. high', float, 0),
+        ('low', '04. low', float, 0),
+        ('open', '02. open', float, 0),
+        ('previous_close', '08. previous close', float, 0),
+    )
+
+    _BULK_QUOTE_FIELDS = (
+        ('symbol', 'symbol', str, ''),
+        ('price', 'close', float, 0),
+        ('change', 'change', float, 0),
+        ('change_percent', 'change_percent', str, '0%'),
+        ('volume', 'volume', int, 0),
+        ('high', 'high', float, 0),
+        ('low', 'low', float, 0),
+        ('open', 'open', float, 0),
+        ('previous_close', 'previous_close', float, 0),
+    )
+
     def __init__(self):
-        self.bot = Bot(token=BOT_TOKEN)
+        # Одна keep-alive сесія для всіх викликів Telegram API —
+        # без TLS-рукостискання на кожен message.answer
+        self.bot = Bot(token=BOT_TOKEN, session=AiohttpSession())
         self.dp = Dispatcher(storage=MemoryStorage())
+        self.session: Optional["aiohttp.ClientSession"] = None
+        # Базовий URL Alpha Vantage розбираємо один раз, а не на кожен запит
+        self._av_url = URL("https://www.alphavantage.co/query")
+        self._av_key = ALPHA_VANTAGE_API_KEY
+        # Обмежуємо паралельні запити до Alpha Vantage (free tier ~5 запитів/хв)
+        self._av_sem = asyncio.Semaphore(4)
+        self._av_pace_lock = asyncio.Lock()
+        self._av_last_call = 0.0
+        # Кеш відповідей API: ключ -> (monotonic-мітка, дані)
+        self._quote_cache: Dict[str, tuple] = {}
+        # Другий рівень кешу — Redis, спільний між процесами бота
+        self.redis = aioredis.from_url(REDIS_URL, decode_responses=False) \
+            if (REDIS_URL and aioredis is not None) else None
+        # Масовий endpoint доступний лише на преміум-ключах; після першої
+        # відмови перемикаємось на паралельні одиночні запити назавжди
+        self._av_bulk_supported = True
+        # Кеш форматованого часу: strftime викликається раз на хвилину
+        self._ts_cache = (0, "")
+        # Статичні клавіатури будуємо один раз, а не на кожне повідомлення
+        self._main_kb = self._build_main_keyboard()
+        self._top_stocks_kb = self._build_top_stocks_keyboard()
         self.init_database()
         self.register_handlers()
-        
+
+    async def _ensure_session(self) -> "aiohttp.ClientSession":
+        """Лінива ініціалізація спільної HTTP-сесії (keep-alive, пул з'єднань)"""
+        if self.session is None or self.session.closed:
+            import aiohttp
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return self.session
+
+    def _now_str(self) -> str:
+        """Поточний час 'YYYY-MM-DD HH:MM' — перераховується раз на хвилину"""
+        minute = int(time.time() // 60)
+        if minute != self._ts_cache[0]:
+            self._ts_cache = (minute, datetime.now().strftime('%Y-%m-%d %H:%M'))
+        return self._ts_cache[1]
+
+    async def _av_throttle(self):
+        """Витримує мінімальний інтервал між запитами до Alpha Vantage
+        (потрібно для free-tier ключів; 0 — без пауз)"""
+        if ALPHA_VANTAGE_MIN_INTERVAL <= 0:
+            return
+        async with self._av_pace_lock:
+            elapsed = time.monotonic() - self._av_last_call
+            if elapsed < ALPHA_VANTAGE_MIN_INTERVAL:
+                await asyncio.sleep(ALPHA_VANTAGE_MIN_INTERVAL - elapsed)
+            self._av_last_call = time.monotonic()
+
+    def _build_main_keyboard(self) -> ReplyKeyboardMarkup:
+        """Головне меню (незмінне — збирається один раз при старті)"""
+        kb = ReplyKeyboardBuilder()
+        kb.add(KeyboardButton(text="📊 Аналіз акції"))
+        kb.add(KeyboardButton(text="🏢 Огляд компанії"))
+        kb.add(KeyboardButton(text="📋 Мій список"))
+        kb.add(KeyboardButton(text="🧮 Калькулятор"))
+        kb.add(KeyboardButton(text="💡 Поради"))
+        kb.add(KeyboardButton(text="📈 Топ акції"))
+        kb.adjust(2)
+        return kb.as_markup(resize_keyboard=True)
+
+    def _build_top_stocks_keyboard(self) -> InlineKeyboardMarkup:
+        """Клавіатура популярних акцій (незмінна)"""
+        top_stocks = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", "JPM"]
+        kb = InlineKeyboardBuilder()
+        for stock in top_stocks:
+            kb.add(InlineKeyboardButton(text=stock, callback_data=f"analyze_{stock}"))
+        kb.adjust(2)
+        return kb.as_markup()
+
     def init_database(self):
         """Ініціалізація бази даних"""
-        conn = sqlite3.connect('financial_bot.db')
-        cursor = conn.cursor()
-        
-        
+        # Одне довгоживуче з'єднання замість connect/close на кожен запит
+        self.conn = sqlite3.connect('financial_bot.db', check_same_thread=False,
+                                    isolation_level=None, cached_statements=256)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-16000")
+        cursor = self.conn.cursor()
+
+
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
                 user_id INTEGER PRIMARY KEY,
@@ -67,6 +287,14 @@ class FinancialBot:
         ''')
         
 
+        # Індекси: пошук списку за user_id без повного сканування таблиці,
+        # унікальність захищає від дублікатів тікерів у списку
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_watchlist_user
+            ON watchlist(user_id, ticker)
+        ''')
+
+
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS alerts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -79,90 +307,169 @@ class FinancialBot:
                 FOREIGN KEY (user_id) REFERENCES users (user_id)
             )
         ''')
-        
-        conn.commit()
-        conn.close()
+
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_alerts_user
+            ON alerts(user_id, is_active)
+        ''')
+
+    async def _cached(self, key: str, ttl: float, coro_factory) -> Optional[Dict]:
+        """Повертає дані з TTL-кешу або виконує живий запит і кешує результат.
+
+        Два рівні: пам'ять процесу, потім Redis (якщо налаштований);
+        будь-яка помилка кешу деградує до живого запиту."""
+        try:
+            entry = self._quote_cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] < ttl:
+                logger.debug(f"Кеш: влучання для {key}")
+                return entry[1]
+            logger.debug(f"Кеш: промах для {key}")
+        except Exception as e:
+            logger.error(f"Помилка кешу для {key}: {e}")
+            return await coro_factory()
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(key)
+                if raw is not None:
+                    logger.debug(f"Redis: влучання для {key}")
+                    data = _json_loads(raw)
+                    self._quote_cache[key] = (time.monotonic(), data)
+                    return data
+            except Exception as e:
+                logger.debug(f"Redis недоступний для {key}: {e}")
+
+        data = await coro_factory()
+        if data is not None:
+            self._quote_cache[key] = (time.monotonic(), data)
+            if self.redis is not None:
+                try:
+                    await self.redis.setex(key, int(ttl), _json_dumps(data))
+                except Exception as e:
+                    logger.debug(f"Redis недоступний для {key}: {e}")
+        return data
 
     async def get_stock_data(self, ticker: str) -> Optional[Dict]:
-        """Отримання даних про акцію через Alpha Vantage API"""
-        url = f"https://www.alphavantage.co/query"
-        params = {
-            'function': 'GLOBAL_QUOTE',
-            'symbol': ticker,
-            'apikey': ALPHA_VANTAGE_API_KEY
-        }
-        
+        """Отримання даних про акцію (кеш 60с поверх Alpha Vantage API)"""
+        return await self._cached(f"quote:{ticker}", 60,
+                                  lambda: self._fetch_stock_data(ticker))
+
+    async def _fetch_stock_data(self, ticker: str) -> Optional[Dict]:
+        """Живий запит GLOBAL_QUOTE до Alpha Vantage"""
+        url = self._av_url.with_query(function='GLOBAL_QUOTE', symbol=ticker,
+                                      apikey=self._av_key)
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    data = await response.json()
-                    
-                    if 'Global Quote' in data:
-                        quote = data['Global Quote']
-                        return {
-                            'symbol': quote.get('01. symbol', ''),
-                            'price': float(quote.get('05. price', 0)),
-                            'change': float(quote.get('09. change', 0)),
-                            'change_percent': quote.get('10. change percent', '0%'),
-                            'volume': int(quote.get('06. volume', 0)),
-                            'high': float(quote.get('03. high', 0)),
-                            'low': float(quote.get('04. low', 0)),
-                            'open': float(quote.get('02. open', 0)),
-                            'previous_close': float(quote.get('08. previous close', 0))
-                        }
+            session = await self._ensure_session()
+            async with self._av_sem:
+                await self._av_throttle()
+                async with session.get(url) as response:
+                    data = _json_loads(await response.read())
+
+                if 'Global Quote' in data:
+                    quote = data['Global Quote']
+                    return {out: conv(quote.get(src, default))
+                            for out, src, conv, default in self._QUOTE_FIELDS}
         except Exception as e:
             logger.error(f"Помилка отримання даних для {ticker}: {e}")
             return None
 
+    async def get_bulk_quotes(self, tickers: List[str]) -> Dict[str, Optional[Dict]]:
+        """Котирування для кількох тікерів: один bulk-запит на преміум-ключі,
+        інакше паралельні GLOBAL_QUOTE під семафором"""
+        if self._av_bulk_supported:
+            quotes = await self._fetch_bulk_quotes(tickers)
+            if quotes is not None:
+                return quotes
+
+        results = await asyncio.gather(
+            *(self.get_stock_data(ticker) for ticker in tickers),
+            return_exceptions=True
+        )
+        return {ticker: (data if not isinstance(data, Exception) else None)
+                for ticker, data in zip(tickers, results)}
+
+    async def _fetch_bulk_quotes(self, tickers: List[str]) -> Optional[Dict[str, Dict]]:
+        """Один запит REALTIME_BULK_QUOTES; None якщо ключ не преміум"""
+        url = self._av_url.with_query(function='REALTIME_BULK_QUOTES',
+                                      symbol=','.join(tickers), apikey=self._av_key)
+
+        try:
+            session = await self._ensure_session()
+            async with self._av_sem:
+                await self._av_throttle()
+                async with session.get(url) as response:
+                    data = _json_loads(await response.read())
+
+            if 'data' not in data:
+                # "Invalid API call" / повідомлення про преміум — деградуємо
+                logger.info("REALTIME_BULK_QUOTES недоступний, переходжу на одиночні запити")
+                self._av_bulk_supported = False
+                return None
+
+            quotes = {}
+            for quote in data['data']:
+                parsed = {out: conv(quote.get(src, default))
+                          for out, src, conv, default in self._BULK_QUOTE_FIELDS}
+                quotes[parsed['symbol']] = parsed
+            return {ticker: quotes.get(ticker) for ticker in tickers}
+        except Exception as e:
+            logger.error(f"Помилка масового запиту котирувань: {e}")
+            return None
+
     async def get_company_overview(self, ticker: str) -> Optional[Dict]:
-        """Отримання детальної інформації про компанію"""
-        url = f"https://www.alphavantage.co/query"
-        params = {
-            'function': 'OVERVIEW',
-            'symbol': ticker,
-            'apikey': ALPHA_VANTAGE_API_KEY
-        }
-        
+        """Отримання детальної інформації про компанію (кеш 6 год)"""
+        return await self._cached(f"overview:{ticker}", 6 * 3600,
+                                  lambda: self._fetch_company_overview(ticker))
+
+    async def _fetch_company_overview(self, ticker: str) -> Optional[Dict]:
+        """Живий запит OVERVIEW до Alpha Vantage"""
+        url = self._av_url.with_query(function='OVERVIEW', symbol=ticker,
+                                      apikey=self._av_key)
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    data = await response.json()
-                    if 'Symbol' in data:
-                        return data
+            session = await self._ensure_session()
+            async with self._av_sem:
+                await self._av_throttle()
+                async with session.get(url) as response:
+                    data = _json_loads(await response.read())
+
+            if 'Symbol' in data:
+                return data
         except Exception as e:
             logger.error(f"Помилка отримання огляду для {ticker}: {e}")
             return None
 
-    def save_user(self, user_id: int, username: str, first_name: str):
-        """Збереження користувача в БД"""
-        conn = sqlite3.connect('financial_bot.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO users (user_id, username, first_name)
-            VALUES (?, ?, ?)
-        ''', (user_id, username, first_name))
-        conn.commit()
-        conn.close()
-
-    def add_to_watchlist(self, user_id: int, ticker: str):
+    def _save_user_sync(self, user_id: int, username: str, first_name: str):
+        with self.conn:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO users (user_id, username, first_name)
+                VALUES (?, ?, ?)
+            ''', (user_id, username, first_name))
+
+    async def save_user(self, user_id: int, username: str, first_name: str):
+        """Збереження користувача в БД (диск не блокує event loop)"""
+        await asyncio.to_thread(self._save_user_sync, user_id, username, first_name)
+
+    def _add_to_watchlist_sync(self, user_id: int, ticker: str):
+        with self.conn:
+            self.conn.execute('''
+                INSERT OR IGNORE INTO watchlist (user_id, ticker)
+                VALUES (?, ?)
+            ''', (user_id, ticker.upper()))
+
+    async def add_to_watchlist(self, user_id: int, ticker: str):
         """Додавання акції до списку відстеження"""
-        conn = sqlite3.connect('financial_bot.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO watchlist (user_id, ticker)
-            VALUES (?, ?)
-        ''', (user_id, ticker.upper()))
-        conn.commit()
-        conn.close()
+        await asyncio.to_thread(self._add_to_watchlist_sync, user_id, ticker)
+
+    def _get_watchlist_sync(self, user_id: int) -> List[str]:
+        cursor = self.conn.execute('SELECT ticker FROM watchlist WHERE user_id = ?', (user_id,))
+        return [row[0] for row in cursor.fetchall()]
 
-    def get_watchlist(self, user_id: int) -> List[str]:
+    async def get_watchlist(self, user_id: int) -> List[str]:
         """Отримання списку відстеження користувача"""
-        conn = sqlite3.connect('financial_bot.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT ticker FROM watchlist WHERE user_id = ?', (user_id,))
-        result = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return result
+        return await asyncio.to_thread(self._get_watchlist_sync, user_id)
 
     def register_handlers(self):
         """Реєстрація обробників повідомлень"""
@@ -170,43 +477,10 @@ class FinancialBot:
         @self.dp.message(Command("start"))
         async def start_handler(message: types.Message):
             user = message.from_user
-            self.save_user(user.id, user.username or "", user.first_name or "")
+            await self.save_user(user.id, user.username or "", user.first_name or "")
             
-            welcome_text = """
-                ``🏦 <b>Вітаю у Фінансовому Консультанті!</b>
-
-                Я допоможу вам з аналізом фондового ринку:
-
-                📊 <b>Мої можливості:</b>
-                • Аналіз акцій за тікером
-                • Детальна інформація про компанії
-                • Калькулятор інвестицій
-                • Список відстеження акцій
-                • Ринкові новини та поради
-
-                <b>Команди:</b>
-                /stock [TICKER] - аналіз акції
-                /overview [TICKER] - огляд компанії
-                /watchlist - ваш список відстеження
-                /calculator - калькулятор інвестицій
-                /tips - інвестиційні поради
-                /help - допомога
-
-                Введіть тікер акції або скористайтесь меню 👇``
-            """
-            
-           
-            kb = ReplyKeyboardBuilder()
-            kb.add(KeyboardButton(text="📊 Аналіз акції"))
-            kb.add(KeyboardButton(text="🏢 Огляд компанії"))
-            kb.add(KeyboardButton(text="📋 Мій список"))
-            kb.add(KeyboardButton(text="🧮 Калькулятор"))
-            kb.add(KeyboardButton(text="💡 Поради"))
-            kb.add(KeyboardButton(text="📈 Топ акції"))
-            kb.adjust(2)
-            
-            await message.answer(welcome_text, parse_mode="HTML", 
-                               reply_markup=kb.as_markup(resize_keyboard=True))
+            await message.answer(WELCOME_TEXT, parse_mode="HTML",
+                               reply_markup=self._main_kb)
 
         @self.dp.message(Command("stock"))
         async def stock_command(message: types.Message):
@@ -230,16 +504,19 @@ class FinancialBot:
 
         @self.dp.message(Command("watchlist"))
         async def watchlist_command(message: types.Message):
-            watchlist = self.get_watchlist(message.from_user.id)
-            
+            watchlist = await self.get_watchlist(message.from_user.id)
+
             if not watchlist:
                 await message.answer("📋 Ваш список відстеження порожній.\n"
                                    "Додайте акції командою /stock [TICKER] та натисніть 'Додати до списку'")
                 return
-            
+
+            # Один bulk-запит (або паралельні одиночні) замість послідовного циклу
+            quotes = await self.get_bulk_quotes(watchlist)
+
             text = "📋 <b>Ваш список відстеження:</b>\n\n"
             for ticker in watchlist:
-                stock_data = await self.get_stock_data(ticker)
+                stock_data = quotes.get(ticker)
                 if stock_data:
                     change_emoji = "📈" if stock_data['change'] > 0 else "📉"
                     text += f"{change_emoji} <b>{ticker}</b>: ${stock_data['price']:.2f} "
@@ -262,18 +539,7 @@ class FinancialBot:
 
         @self.dp.message(Command("tips"))
         async def tips_command(message: types.Message):
-            tips = [
-                "💡 <b>Диверсифікація</b> - не вкладайте всі гроші в одну акцію",
-                "📊 <b>Аналізуйте P/E ratio</b> - показник переоціненості компанії",
-                "🎯 <b>Довгострокові інвестиції</b> зазвичай менш ризиковані",
-                "📈 <b>Dollar Cost Averaging</b> - купуйте регулярно малими сумами",
-                "🔍 <b>Вивчайте компанію</b> перед інвестуванням",
-                "⚖️ <b>Ризик та прибуток</b> завжди пов'язані",
-                "📰 <b>Слідкуйте за новинami</b> компанії та ринку"
-            ]
-            
-            tip_text = "💡 <b>Інвестиційні поради:</b>\n\n" + "\n\n".join(tips)
-            await message.answer(tip_text, parse_mode="HTML")
+            await message.answer(TIPS_TEXT, parse_mode="HTML")
 
         @self.dp.message(F.text == "📊 Аналіз акції")
         async def analyze_stock_button(message: types.Message, state: FSMContext):
@@ -299,17 +565,10 @@ class FinancialBot:
 
         @self.dp.message(F.text == "📈 Топ акції")
         async def top_stocks_button(message: types.Message):
-            top_stocks = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", "JPM"]
-            
-            kb = InlineKeyboardBuilder()
-            for stock in top_stocks:
-                kb.add(InlineKeyboardButton(text=stock, callback_data=f"analyze_{stock}"))
-            kb.adjust(2)
-            
             await message.answer(
                 "📈 <b>Популярні акції:</b>\n\nОберіть акцію для аналізу:",
                 parse_mode="HTML",
-                reply_markup=kb.as_markup()
+                reply_markup=self._top_stocks_kb
             )
 
         @self.dp.callback_query(F.data.startswith("analyze_"))
@@ -321,7 +580,7 @@ class FinancialBot:
         @self.dp.callback_query(F.data.startswith("add_watchlist_"))
         async def add_watchlist_callback(callback: types.CallbackQuery):
             ticker = callback.data.split("_")[2]
-            self.add_to_watchlist(callback.from_user.id, ticker)
+            await self.add_to_watchlist(callback.from_user.id, ticker)
             await callback.answer(f"✅ {ticker} додано до списку відстеження!")
 
         @self.dp.callback_query(F.data.startswith("overview_"))
@@ -338,33 +597,41 @@ class FinancialBot:
 
         @self.dp.message(StateFilter(UserStates.calculator_input))
         async def process_calculator(message: types.Message, state: FSMContext):
-            try:
-                parts = message.text.strip().split()
-                if len(parts) != 3:
-                    raise ValueError("Неправильний формат")
-                
-                ticker, shares_str, buy_price_str = parts
-                shares = int(shares_str)
-                buy_price = float(buy_price_str)
-                
-                # Отримуємо поточну ціну
-                stock_data = await self.get_stock_data(ticker.upper())
-                if not stock_data:
-                    await message.answer("❌ Не вдалося знайти дані для цієї акції")
-                    return
-                
-                current_price = stock_data['price']
-                total_invested = shares * buy_price
-                current_value = shares * current_price
-                profit_loss = current_value - total_invested
-                profit_percent = (profit_loss / total_invested) * 100
-                
-                profit_emoji = "📈" if profit_loss > 0 else "📉"
-                
-                result_text = f"""
+            # Валідація формату одним прекомпільованим regex — без try/except
+            m = _CALC_RE.match(message.text or "")
+            if m is None or int(m.group(2)) == 0 or float(m.group(3)) == 0:
+                await message.answer(
+                    "❌ Помилка в форматі даних!\n\n"
+                    "Використовуйте формат: <code>TICKER кількість ціна</code>\n"
+                    "Приклад: <code>AAPL 10 150.50</code>",
+                    parse_mode="HTML"
+                )
+                await state.clear()
+                return
+
+            ticker = m.group(1).upper()
+            shares = int(m.group(2))
+            buy_price = float(m.group(3))
+
+            # Отримуємо поточну ціну
+            stock_data = await self.get_stock_data(ticker)
+            if not stock_data:
+                await message.answer("❌ Не вдалося знайти дані для цієї акції")
+                await state.clear()
+                return
+
+            current_price = stock_data['price']
+            total_invested = shares * buy_price
+            current_value = shares * current_price
+            profit_loss = current_value - total_invested
+            profit_percent = (profit_loss / total_invested) * 100
+
+            profit_emoji = "📈" if profit_loss > 0 else "📉"
+
+            result_text = f"""
 🧮 <b>Розрахунок інвестицій</b>
 
-📊 <b>Акція:</b> {ticker.upper()}
+📊 <b>Акція:</b> {ticker}
 💰 <b>Поточна ціна:</b> ${current_price:.2f}
 🔢 <b>Кількість акцій:</b> {shares}
 💵 <b>Ціна покупки:</b> ${buy_price:.2f}
@@ -373,95 +640,78 @@ class FinancialBot:
 💰 <b>Поточна вартість:</b> ${current_value:.2f}
 
 {profit_emoji} <b>Прибуток/Збиток:</b> ${profit_loss:.2f} ({profit_percent:+.2f}%)
-                """
-                
-                await message.answer(result_text, parse_mode="HTML")
-                
-            except Exception as e:
-                await message.answer(
-                    "❌ Помилка в форматі даних!\n\n"
-                    "Використовуйте формат: <code>TICKER кількість ціна</code>\n"
-                    "Приклад: <code>AAPL 10 150.50</code>",
-                    parse_mode="HTML"
-                )
-            
+            """
+
+            await message.answer(result_text, parse_mode="HTML")
             await state.clear()
 
     async def send_stock_analysis(self, message: types.Message, ticker: str):
         """Відправка аналізу акції"""
-        await message.answer("🔍 Шукаю дані...")
-        
+        # Статусне повідомлення летить паралельно із запитом до API,
+        # а результат редагує його — мінус два RTT до Telegram
+        status_task = asyncio.create_task(message.answer("🔍 Шукаю дані..."))
+
         stock_data = await self.get_stock_data(ticker)
+        status_msg = await status_task
         if not stock_data:
-            await message.answer(f"❌ Не вдалося знайти дані для {ticker}")
+            await status_msg.edit_text(f"❌ Не вдалося знайти дані для {ticker}")
             return
-        
-        change_emoji = "📈" if stock_data['change'] > 0 else "📉"
-        change_color = "🟢" if stock_data['change'] > 0 else "🔴"
-        
-        analysis_text = f"""
-📊 <b>Аналіз акції {stock_data['symbol']}</b>
 
-💰 <b>Поточна ціна:</b> ${stock_data['price']:.2f}
-{change_emoji} <b>Зміна:</b> {change_color} ${stock_data['change']:+.2f} ({stock_data['change_percent']})
+        render = dict(stock_data)
+        render['change_emoji'] = "📈" if stock_data['change'] > 0 else "📉"
+        render['change_color'] = "🟢" if stock_data['change'] > 0 else "🔴"
+        render['updated'] = self._now_str()
+        analysis_text = STOCK_TEMPLATE.format_map(render)
 
-📈 <b>Максимум дня:</b> ${stock_data['high']:.2f}
-📉 <b>Мінімум дня:</b> ${stock_data['low']:.2f}
-🎯 <b>Ціна відкриття:</b> ${stock_data['open']:.2f}
-🔒 <b>Попереднє закриття:</b> ${stock_data['previous_close']:.2f}
-📊 <b>Об'єм торгів:</b> {stock_data['volume']:,}
 
-⏰ <b>Оновлено:</b> {datetime.now().strftime('%Y-%m-%d %H:%M')}
-        """
-        
+        # Розкладка незмінна — збираємо розмітку напряму, без Builder
+        markup = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="➕ Додати до списку",
+                                  callback_data=f"add_watchlist_{ticker}")],
+            [InlineKeyboardButton(text="🏢 Огляд компанії",
+                                  callback_data=f"overview_{ticker}")]
+        ])
 
-        kb = InlineKeyboardBuilder()
-        kb.add(InlineKeyboardButton(text="➕ Додати до списку", 
-                                  callback_data=f"add_watchlist_{ticker}"))
-        kb.add(InlineKeyboardButton(text="🏢 Огляд компанії", 
-                                  callback_data=f"overview_{ticker}"))
-        kb.adjust(1)
-        
-        await message.answer(analysis_text, parse_mode="HTML", 
-                           reply_markup=kb.as_markup())
+        await status_msg.edit_text(analysis_text, parse_mode="HTML",
+                                   reply_markup=markup)
 
     async def send_company_overview(self, message: types.Message, ticker: str):
         """Відправка огляду компанії"""
-        await message.answer("🔍 Завантажую дані про компанію...")
-        
+        status_task = asyncio.create_task(message.answer("🔍 Завантажую дані про компанію..."))
+
         overview_data = await self.get_company_overview(ticker)
+        status_msg = await status_task
         if not overview_data:
-            await message.answer(f"❌ Не вдалося знайти дані про компанію {ticker}")
+            await status_msg.edit_text(f"❌ Не вдалося знайти дані про компанію {ticker}")
             return
-        
-        overview_text = f"""
-🏢 <b>Огляд компанії {overview_data.get('Symbol', ticker)}</b>
 
-📝 <b>Назва:</b> {overview_data.get('Name', 'N/A')}
-🏭 <b>Сектор:</b> {overview_data.get('Sector', 'N/A')}
-🔧 <b>Індустрія:</b> {overview_data.get('Industry', 'N/A')}
-🌍 <b>Країна:</b> {overview_data.get('Country', 'N/A')}
+        render = defaultdict(lambda: 'N/A')
+        render.update(overview_data)
+        render.setdefault('Symbol', ticker)
+        # Ключі, що починаються з цифри, недоступні для format_map напряму
+        render['week_high'] = render['52WeekHigh']
+        render['week_low'] = render['52WeekLow']
+        render['description_short'] = overview_data.get('Description', 'Опис недоступний')[:500]
+        overview_text = OVERVIEW_TEMPLATE.format_map(render)
 
-💹 <b>Ринкова капіталізація:</b> ${overview_data.get('MarketCapitalization', 'N/A')}
-💰 <b>P/E коефіцієнт:</b> {overview_data.get('PERatio', 'N/A')}
-📊 <b>EPS:</b> {overview_data.get('EPS', 'N/A')}
-💵 <b>Дивіденди:</b> {overview_data.get('DividendYield', 'N/A')}
-
-📈 <b>52-тижневий максимум:</b> ${overview_data.get('52WeekHigh', 'N/A')}
-📉 <b>52-тижневий мінімум:</b> ${overview_data.get('52WeekLow', 'N/A')}
-
-📄 <b>Опис:</b> {overview_data.get('Description', 'Опис недоступний')[:500]}...
-        """
-        
-        await message.answer(overview_text, parse_mode="HTML")
+        await status_msg.edit_text(overview_text, parse_mode="HTML")
 
     async def start_bot(self):
         """Запуск бота"""
         logger.info("Бот запускається...")
-        await self.dp.start_polling(self.bot)
+        try:
+            await self.dp.start_polling(self.bot)
+        finally:
+            if self.session is not None:
+                await self.session.close()
+            if self.redis is not None:
+                await self.redis.aclose()
+            await self.bot.session.close()
+            self.conn.close()
 
 
 async def main():
+    load_config()
     bot = FinancialBot()
     await bot.start_bot()
 